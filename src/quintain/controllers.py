@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from quintain.utility import TimeSeries
+from quintain.utility import Capture, TimeSeries
 
 
 class Controller:
@@ -12,32 +12,61 @@ class Controller:
                 A callable that takes a ``dict[str, Port]`` (noop by
                 default)
         """
-        self._fn = fn or (lambda ports, state: None)
+        self._fn = fn
+
+    @property
+    def fn(self) -> Optional[Callable]:
+        return self._fn
 
     def execute(self, ports: dict[str, Port], state: State):
-        self._fn(ports, state)
+        if self._fn is not None:
+            self._fn(ports, state)
 
 
 class Recorder:
-    def __init__(self):
-        """Captures the values of the controlled ports."""
+    def __init__(self, typecode: Optional[str] = None, rle: bool = False):
+        """Captures the values of the controlled ports.
+
+        Args:
+            typecode:
+                If set, the values of each port are stored in an
+                ``array.array`` with this type code instead of a
+                ``list`` (see ``quintain.utility.Capture``)
+            rle:
+                If set, the values of each port are run-length encoded
+                while recording, which saves memory if the values
+                rarely change (see ``quintain.utility.RunLengthSeries``)
+        """
         self._data = {}
+        # The ports are bound on the first call of ``execute`` (and
+        # whenever the recorder is called with a different set of
+        # ports), so that the per-cycle loop doesn't have to touch
+        # ``self._data``.
+        self._ports = None
+        self._rle = rle
+        self._capture = Capture(typecode, rle)
 
     def execute(self, ports: dict[str, Port], _: State) -> None:
-        for _, p in ports.items():
-            values = self._data.get(p.name)
-            if values is None:
-                values = []
-                self._data[p.name] = values
-            values.append(p.value)
+        if ports is not self._ports:
+            self._ports = ports
+            self._capture.clear()
+            for _, p in ports.items():
+                self._capture.bind(p, self._data, p.name)
+        self._capture.record()
 
     @property
     def data(self):
         """The captured data.
 
         Maps port names to a list of values, which, at index ``i``,
-        holds the value of the port at cycle ``i``.
+        holds the value of the port at cycle ``i``. If ``typecode`` is
+        set, the values are an ``array.array`` instead (unless they
+        fell back to a ``list``), which doesn't compare equal to a
+        ``list``. If the data is run-length encoded, it's expanded on
+        every access.
         """
+        if self._rle:
+            return {k: list(v) for k, v in self._data.items()}
         return self._data
 
 
@@ -55,10 +84,22 @@ class LookupTable:
             AssertionError: If for any pair the time and value lists
             don't have the same length
         """
-        self._values = {
-            k: TimeSeries(time, values) for k, (time, values) in values.items()
+        # Since cycles are consecutive integers, the lookup table is
+        # expanded into one value per cycle up to the last time point
+        # (see ``TimeSeries.schedule``).
+        self._schedules = {
+            k: TimeSeries(time, values).schedule()
+            for k, (time, values) in values.items()
         }
+        # Triples of ports and their schedules, bound on the first call
+        # of ``execute`` (see ``Recorder``).
+        self._ports = None
+        self._bound = []
 
     def execute(self, ports: dict[str, Port], state: State) -> None:
-        for _, p in ports.items():
-            p.value = self._values[p.name].get(state.cycles)
+        if ports is not self._ports:
+            self._ports = ports
+            self._bound = [(p, *self._schedules[p.name]) for p in ports.values()]
+        cycle = state.cycles
+        for p, schedule, get in self._bound:
+            p.value = schedule[cycle] if cycle < len(schedule) else get(cycle)
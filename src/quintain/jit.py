@@ -0,0 +1,54 @@
+"""Numeric controllers compiled with Numba.
+
+This module requires ``numba`` (install with ``pip install
+quintain[jit]``).
+"""
+
+from __future__ import annotations
+
+import numba
+
+from quintain.controllers import Controller
+
+
+def jit_controller(
+    signature: str, inputs: list[str], output: str
+) -> Callable[[Callable], Controller]:
+    """Compile a numeric function into a controller.
+
+    Args:
+        signature:
+            The Numba signature of the function (for example,
+            ``"float64(float64, int64)"``)
+        inputs:
+            The names of the ports whose values are passed to the
+            function
+        output: The name of the port to which the result is written
+
+    The decorated function is called with the values of the ``inputs``
+    ports and the current cycle, and returns the new value of the
+    ``output`` port. It's compiled with the explicit ``signature`` when
+    it's decorated (instead of on the first call), and the compiled code
+    is cached on disk.
+
+    Example:
+
+        @jit_controller("float64(float64, int64)", ["number"], "result")
+        def add_two(number, cycle):
+            return number + 2
+
+        server.add_device(
+            "add_two", [Port("number", 0.0), Port("result", 0.0)], add_two
+        )
+    """
+
+    def decorator(fn: Callable) -> Controller:
+        compiled = numba.njit(signature, cache=True)(fn)
+
+        def execute(ports: dict[str, Port], state: State) -> None:
+            args = [ports[name].value for name in inputs]
+            ports[output].value = compiled(*args, state.cycles)
+
+        return Controller(execute)
+
+    return decorator
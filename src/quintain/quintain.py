@@ -4,8 +4,12 @@ import asyncio
 import bisect
 from collections import OrderedDict
 import dataclasses
+import functools
+import inspect
+import sys
 import time
 
+from quintain.controllers import Controller
 from quintain.exceptions import (
     NoSuchPort,
     NoSuchDevice,
@@ -13,14 +17,36 @@ from quintain.exceptions import (
     DuplicateDeviceError,
 )
 
+# Ports are accessed on every transfer, which is faster if they're
+# slotted. ``slots`` requires Python 3.10.
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(**_DATACLASS_OPTIONS)
 class Port:
     name: str
     value: Optional = None
 
 
-@dataclasses.dataclass
+class PortBag(dict):
+    def __init__(self, ports: list[Port]) -> None:
+        """Maps port names to ports.
+
+        Args:
+            ports: The ports
+
+        The ports are also available as attributes (for example,
+        ``ports.number`` instead of ``ports.get("number")``), unless
+        their name clashes with an attribute of ``PortBag``.
+        """
+        super().__init__((p.name, p) for p in ports)
+        self._items = tuple(self.values())
+        self.__dict__.update(
+            (name, port) for name, port in self.items() if not hasattr(self, name)
+        )
+
+
+@dataclasses.dataclass(**_DATACLASS_OPTIONS)
 class Connection:
     sender: Port
     receiver: Port
@@ -57,6 +83,22 @@ class AbstractService:
         pass
 
 
+def _takes_state(fn: Callable, *args) -> bool:
+    """Check if ``fn`` accepts a ``state`` argument in addition to
+    ``args``.
+
+    If the signature of ``fn`` can't be inspected, ``state`` is always
+    passed.
+    """
+    try:
+        inspect.signature(fn).bind(*args, None)
+    except TypeError:
+        return False
+    except ValueError:
+        pass
+    return True
+
+
 class Client:
     def __init__(
         self,
@@ -72,30 +114,121 @@ class Client:
             controller: The internal logic of the device
         """
         self._name = name
-        self._ports = {p.name: p for p in ports}
+        self._ports = PortBag(ports)
+        self._port_values = self._ports._items
         self._controller = controller
+        # Controllers without logic are skipped entirely, and ``state``
+        # is only passed to controllers which take it.
+        if controller is None or (
+            getattr(controller.execute, "__func__", None) is Controller.execute
+            and controller.fn is None
+        ):
+            self._execute = None
+        else:
+            self._execute = controller.execute
+        self._takes_state = self._execute is not None and _takes_state(
+            self._execute, self._ports
+        )
 
     @property
     def name(self) -> str:
         return self._name
 
     @property
-    def ports(self) -> dict[str, Port]:
+    def ports(self) -> PortBag:
         return self._ports
 
+    @property
+    def port_values(self) -> tuple[Port, ...]:
+        """The ports of the device in the order in which they were
+        passed."""
+        return self._port_values
+
     def fn(self, state: State) -> None:
         """Execute the device's internal logic."""
-        if self._controller is None:
+        if self._execute is None:
             return
-        self._controller.execute(self._ports, state)
+        if self._takes_state:
+            self._execute(self._ports, state)
+        else:
+            self._execute(self._ports)
 
 
 class Server:
     def __init__(self, state: Optional[State] = None) -> None:
-        self._services: list[tuple[int, Service]] = []
         self._clients: dict[str, Client] = {}
         self._connections: list[Connection] = []
         self._state = state or State()
+        # The services are kept in the order in which they are executed:
+        # Their negated priorities (for finding the insertion point of
+        # new services), their ``execute`` methods paired with a flag
+        # which marks if ``execute`` takes the ``state`` argument, and
+        # ``execute`` with all arguments already bound.
+        self._priorities: list[int] = []
+        self._services: list[tuple[Callable, bool]] = []
+        self._exec_order: list[Callable[[], None]] = []
+        # Senders of ``self._connections`` paired with their receivers,
+        # compiled lazily to avoid going through ``Connection.transfer``
+        # every cycle.
+        self._fanout: list[tuple[Port, list[Port]]] = []
+        self._connections_dirty = False
+        self._frozen = False
+
+    def freeze(self) -> None:
+        """Compile ``next_cycle`` for the current services, devices and
+        connections.
+
+        The compiled ``next_cycle`` executes the services, controllers
+        and transfers as straight-line code, which saves the overhead
+        of looping over them every cycle. Adding services, devices or
+        connections to a frozen server is allowed; ``next_cycle`` is
+        then recompiled on its next call.
+        """
+        self._frozen = True
+        if self._connections_dirty:
+            self._compile_transfers()
+        args = {
+            "clients": self._clients,
+            "connections": self._connections,
+            "state": self._state,
+        }
+        body = []
+        for i, (execute, takes_state) in enumerate(self._services):
+            args[f"service{i}"] = execute
+            state_arg = ", state" if takes_state else ""
+            body.append(f"service{i}(clients, connections{state_arg})")
+        for i, c in enumerate(self._clients.values()):
+            if c._execute is None:
+                continue
+            args[f"controller{i}"] = c._execute
+            args[f"ports{i}"] = c.ports
+            state_arg = ", state" if c._takes_state else ""
+            body.append(f"controller{i}(ports{i}{state_arg})")
+        for i, (sender, receivers) in enumerate(self._fanout):
+            args[f"sender{i}"] = sender
+            if len(receivers) == 1:
+                args[f"receiver{i}"] = receivers[0]
+                body.append(f"receiver{i}.value = sender{i}.value")
+                continue
+            body.append(f"value{i} = sender{i}.value")
+            for j, receiver in enumerate(receivers):
+                args[f"receiver{i}_{j}"] = receiver
+                body.append(f"receiver{i}_{j}.value = value{i}")
+        body.append("state._cycles += 1")
+        # The objects are passed to a factory function, so that the
+        # compiled function accesses them as closure variables.
+        source = "\n".join(
+            [f"def make({', '.join(args)}):", "    def next_cycle():"]
+            + [f"        {line}" for line in body]
+            + ["    return next_cycle"]
+        )
+        namespace = {}
+        exec(compile(source, "<next_cycle>", "exec"), namespace)
+        self.next_cycle = namespace["make"](**args)
+
+    def _unfreeze(self) -> None:
+        """Discard the compiled ``next_cycle`` (if any)."""
+        self.__dict__.pop("next_cycle", None)
 
     def next_cycle(self) -> None:
         """Advance to the next cycle.
@@ -103,12 +236,20 @@ class Server:
         This function executes all controllers present on the server and
         then transfers data through the connections.
         """
-        for _, s in reversed(self._services):
-            s.execute(self._clients, self._connections, self._state)
+        if self._frozen:
+            self.freeze()
+            self.next_cycle()
+            return
+        for execute in self._exec_order:
+            execute()
         for _, c in self._clients.items():
             c.fn(self._state)
-        for c in self._connections:
-            c.transfer()
+        if self._connections_dirty:
+            self._compile_transfers()
+        for sender, receivers in self._fanout:
+            value = sender.value
+            for receiver in receivers:
+                receiver.value = value
         self._state._cycles += 1  # _cycles is considered public in this module
 
     def add_device(
@@ -133,6 +274,7 @@ class Server:
             raise DuplicateDeviceError(f"Device with name '{name}' already exists")
         client = Client(name, ports, controller)
         self._clients[name] = client
+        self._unfreeze()
 
     def add_connection(
         self,
@@ -163,6 +305,8 @@ class Server:
         # multiple inputs (an output can connect to multiple inputs, but
         # each input can have at most one output)!
         self._connections.append(Connection(sender, receiver))
+        self._connections_dirty = True
+        self._unfreeze()
 
     def add_service(self, service: AbstractService, priority: int = 0) -> None:
         """Add a service to the server.
@@ -171,11 +315,40 @@ class Server:
             service: The service to add
             priority: The priority of the service
 
-        Services with higher priority are executed before those with lower priority.
+        Services with higher priority are executed before those with
+        lower priority. Services of equal priority are executed in the
+        order in which they were added.
         """
-        # Note that tuples are by default ordered by their first,
-        # element, then the second one, etc.
-        bisect.insort(self._services, (priority, service))
+        execute = service.execute
+        args = [self._clients, self._connections]
+        takes_state = _takes_state(execute, *args)
+        if takes_state:
+            args.append(self._state)
+        index = bisect.bisect_right(self._priorities, -priority)
+        self._priorities.insert(index, -priority)
+        self._services.insert(index, (execute, takes_state))
+        self._exec_order.insert(index, functools.partial(execute, *args))
+        self._unfreeze()
+
+    def _compile_transfers(self) -> None:
+        """Compile the connections into a list of senders and their
+        receivers.
+
+        Connections with the same sender are grouped so that the value
+        of the sender is only read once. As this changes the order of
+        the transfers, connections are only grouped if no port is both
+        sender and receiver, and no port has multiple senders.
+        """
+        senders = {id(c.sender) for c in self._connections}
+        receivers = [id(c.receiver) for c in self._connections]
+        if senders.isdisjoint(receivers) and len(set(receivers)) == len(receivers):
+            groups = {}
+            for c in self._connections:
+                groups.setdefault(id(c.sender), (c.sender, []))[1].append(c.receiver)
+            self._fanout = list(groups.values())
+        else:
+            self._fanout = [(c.sender, [c.receiver]) for c in self._connections]
+        self._connections_dirty = False
 
     def _get_port(self, device: str, port: str) -> Port:
         """Get a port by name.
@@ -220,16 +393,19 @@ class RealTimeServer:
         if duration < 0:
             raise InvalidDuration("duration must be non-negative")
         self._duration = duration
-        self._grain = duration / 1000.0
-        # `self._precision` is picked so that measurements are taken too
-        # early about 50% of the time.
-        self._precision = self._grain / 2
+        # Frames are scheduled in integer nanoseconds, which is exact and
+        # doesn't allocate floats on every frame.
+        self._duration_ns = round(duration * 1e9)
         self._start_time = None
 
         self._server = server or Server()
         self._task = None
         self._event = None
         self._timer = timer or time.perf_counter
+        if timer is None:
+            self._timer_ns = time.perf_counter_ns
+        else:
+            self._timer_ns = lambda: round(timer() * 1e9)
 
     def start(self, name: Optional[str] = None) -> None:
         """Start the server.
@@ -247,6 +423,11 @@ class RealTimeServer:
         assert self._event
         self._event.set()
 
+    def freeze(self) -> None:
+        """Compile ``next_cycle`` of the wrapped server for the current
+        services, devices and connections (see ``Server.freeze``)."""
+        self._server.freeze()
+
     async def join(self) -> None:
         """Wait until done."""
         assert self._task
@@ -260,14 +441,23 @@ class RealTimeServer:
         ``start()`` to run the server.
         """
         cycles = 0
-        start_time = self._timer()
-        while not self._event.is_set():
-            current = self._timer()
-            next_ = start_time + cycles * self._duration
-            if current > next_ - self._precision:
+        start_time = self._timer_ns()
+        # Sleep until the next frame is due or the server is stopped,
+        # whichever comes first, so that the task only wakes up once per
+        # frame and stops without delay.
+        stop = asyncio.ensure_future(self._event.wait())
+        try:
+            while True:
+                next_ = start_time + cycles * self._duration_ns
+                await asyncio.wait(
+                    {stop}, timeout=max(0, next_ - self._timer_ns()) / 1e9
+                )
+                if stop.done():
+                    break
                 cycles += 1
                 self._server.next_cycle()
-            await asyncio.sleep(self._grain)
+        finally:
+            stop.cancel()
 
     def add_connection(
         self,
@@ -323,6 +513,8 @@ class RealTimeServer:
             service: The service to add
             priority: The priority of the service
 
-        Services with higher priority are executed before those with lower priority.
+        Services with higher priority are executed before those with
+        lower priority. Services of equal priority are executed in the
+        order in which they were added.
         """
         self._server.add_service(service, priority)
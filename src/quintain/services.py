@@ -1,45 +1,85 @@
 from __future__ import annotations
 
-from quintain.utility import TimeSeries
+from quintain.utility import Capture, TimeSeries
 
 
 class CaptureAll:
-    def __init__(self):
-        """A service that captures the data of all ports on the server."""
+    def __init__(self, typecode: Optional[str] = None, rle: bool = False):
+        """A service that captures the data of all ports on the server.
+
+        Args:
+            typecode:
+                If set, the values of each port are stored in an
+                ``array.array`` with this type code instead of a
+                ``list`` (see ``quintain.utility.Capture``)
+            rle:
+                If set, the values of each port are run-length encoded
+                while capturing, which saves memory if the values
+                rarely change (see ``quintain.utility.RunLengthSeries``)
+        """
         self._data = {}
+        # The ports are rebound whenever devices are added to the
+        # server.
+        self._clients = None
+        self._num_clients = 0
+        self._rle = rle
+        self._capture = Capture(typecode, rle)
 
     @property
     def data(self) -> dict[str, dict[str, _Value]]:
         """The captured data.
 
-        Maps device names to a dictionary that maps ports names to the
-        captured data.
+        Maps device names to a dictionary that maps ports names to a
+        list of the captured values. If ``typecode`` is set, the values
+        are an ``array.array`` instead (unless they fell back to a
+        ``list``), which doesn't compare equal to a ``list``. If the
+        data is run-length encoded, it's expanded on every access.
         """
+        if self._rle:
+            return {
+                client: {port: list(values) for port, values in ports.items()}
+                for client, ports in self._data.items()
+            }
         return self._data
 
     def execute(self, clients, connections, state) -> None:
         del connections
         del state
+        if clients is not self._clients or len(clients) != self._num_clients:
+            self._bind(clients)
+        self._capture.record()
+
+    def _bind(self, clients) -> None:
+        self._clients = clients
+        self._num_clients = len(clients)
+        self._capture.clear()
         for _, client in clients.items():
-            ports = self._data.get(client.name)
-            if ports is None:
-                ports = {}
-                self._data[client.name] = ports
-            for _, port in client.ports.items():
-                values = ports.get(port.name)
-                if values is None:
-                    values = []
-                    ports[port.name] = values
-                values.append(port.value)
+            ports = self._data.setdefault(client.name, {})
+            for port in client.port_values:
+                self._capture.bind(port, ports, port.name)
 
 
 class ModifyPorts:
     def __init__(self, values: dict[str, dict[str, TimeSeries]]) -> None:
-        self._values = values
+        # See ``LookupTable``.
+        self._schedules = {
+            client_name: {port: ts.schedule() for port, ts in series.items()}
+            for client_name, series in values.items()
+        }
+        # Triples of ports and their schedules, bound on the first call
+        # of ``execute``.
+        self._clients = None
+        self._bound = []
 
     def execute(self, clients, connections, state) -> None:
         del connections
-        for client_name, values in self._values.items():
-            client = clients[client_name]
-            for port, ts in values.items():
-                client.ports.get(port).value = ts.get(state.cycles)
+        if clients is not self._clients:
+            self._clients = clients
+            self._bound = [
+                (clients[client_name].ports.get(port), schedule, get)
+                for client_name, schedules in self._schedules.items()
+                for port, (schedule, get) in schedules.items()
+            ]
+        cycle = state.cycles
+        for port, schedule, get in self._bound:
+            port.value = schedule[cycle] if cycle < len(schedule) else get(cycle)
@@ -1,6 +1,30 @@
 from __future__ import annotations
 
+import array
 import bisect
+import functools
+import math
+
+try:
+    import numba
+    import numpy
+except ImportError:
+    numba = None
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _jit_get(time, values, t):
+        """Compiled version of ``TimeSeries.get`` for ``float64``
+        arrays."""
+        index = numpy.searchsorted(time, t, side="right") - 1
+        return values[max(index, 0)]
+
+
+# ``TimeSeries.schedule`` expands at most this many cycles per time point
+# (or ``_MIN_EXPANSION`` cycles, whichever is greater).
+_EXPANSION_FACTOR = 16
+_MIN_EXPANSION = 1024
 
 
 class TimeSeries:
@@ -15,8 +39,36 @@ class TimeSeries:
             AssertionError: If both lists don't have the same length
         """
         assert len(time) == len(values)
-        self._time = time
-        self._values = values
+        # Take a snapshot, so that the lookup cursor below can't be
+        # invalidated by modifying the lists passed by the caller.
+        self._time = tuple(time)
+        self._values = tuple(values)
+        # If numba is installed (see the ``jit`` extra), lookups in
+        # series of floats are compiled. Other series (for example, of
+        # ints) use the Python implementation, so that the type of the
+        # values is preserved.
+        if (
+            numba is not None
+            and self._time
+            and all(type(x) is float for x in self._time + self._values)
+        ):
+            self.get = functools.partial(
+                _jit_get,
+                numpy.asarray(self._time, dtype=numpy.float64),
+                numpy.asarray(self._values, dtype=numpy.float64),
+            )
+        # Index of the last lookup. Consecutive calls of ``get`` usually
+        # ask for nearby values of ``t`` (often the very same or the
+        # next interval), so the last index is used as a guess and the
+        # neighbouring intervals are checked before bisecting.
+        self._guess = 0
+        # For long series on a (nearly) uniform grid, the index of ``t``
+        # is estimated by interpolation instead of bisecting the entire
+        # series when the guess misses. Whether the grid is uniform is
+        # only checked on the first miss (see ``_check_grid``).
+        self._grid_checked = False
+        self._t0 = self._time[0] if self._time else None
+        self._inv_dt = None
 
     def get(self, t):
         """Return the value of the timeseries at time ``t``.
@@ -24,8 +76,188 @@ class TimeSeries:
         If ``t`` is not in ``self._time``, then the value is
         interpolated by using the value of the previous time point.
         """
-        # Find the right-most value less than ``t``.
-        index = max(0, bisect.bisect_right(self._time, t) - 1)
-        if index == len(self._time):
-            index = -1
+        # Find the right-most time point less than or equal to ``t``.
+        time = self._time
+        n = len(time)
+        guess = self._guess
+        if time[guess] <= t:
+            if guess + 1 == n or t < time[guess + 1]:
+                index = guess
+            elif guess + 2 == n or t < time[guess + 2]:
+                index = guess + 1
+            else:
+                index = self._bisect(t, guess + 2, n) - 1
+        elif guess == 0:
+            index = 0  # ``t`` lies before the first time point
+        elif time[guess - 1] <= t:
+            index = guess - 1
+        else:
+            index = max(0, self._bisect(t, 0, guess - 1) - 1)
+        self._guess = index
         return self._values[index]
+
+    def _bisect(self, t, lo: int, hi: int) -> int:
+        """Return ``bisect.bisect_right(self._time, t, lo, hi)``."""
+        time = self._time
+        if not self._grid_checked:
+            self._check_grid()
+        if self._inv_dt is not None:
+            x = (t - self._t0) * self._inv_dt
+            if 0 <= x < len(time):
+                # Check a small window around the estimate; the result is
+                # only valid if it's not on the boundary of the window.
+                a = max(lo, int(x) - 2)
+                b = min(hi, int(x) + 3)
+                if a < b:
+                    index = bisect.bisect_right(time, t, a, b)
+                    if (a < index or a == lo) and (index < b or b == hi):
+                        return index
+        return bisect.bisect_right(time, t, lo, hi)
+
+    def _check_grid(self) -> None:
+        """Set ``self._inv_dt`` if there are many time points and they
+        are (nearly) uniformly spaced."""
+        self._grid_checked = True
+        time = self._time
+        n = len(time)
+        if n < 64 or time[-1] <= time[0]:
+            return
+        mean = (time[-1] - time[0]) / (n - 1)
+        variance = sum((b - a - mean) ** 2 for a, b in zip(time, time[1:])) / (n - 1)
+        if variance < (0.1 * mean) ** 2:
+            self._inv_dt = 1 / mean
+
+    def expand(self, n_cycles: Optional[int] = None) -> list[_ValueType]:
+        """Return the values of the timeseries at the cycles ``0, 1,
+        ..., n_cycles - 1``.
+
+        Args:
+            n_cycles:
+                The number of cycles to expand (by default, expand up
+                to and including the last time point; the value remains
+                constant after that)
+        """
+        time = self._time
+        if n_cycles is None:
+            n_cycles = max(0, math.floor(time[-1]) + 1)
+        result = []
+        index = 0
+        last = len(time) - 1
+        for cycle in range(n_cycles):
+            while index < last and time[index + 1] <= cycle:
+                index += 1
+            result.append(self._values[index])
+        return result
+
+    def schedule(self) -> tuple[list[_ValueType], Callable]:
+        """Return the per-cycle schedule of the timeseries.
+
+        The schedule is a pair of the expanded values (see ``expand``)
+        and ``get``. The value at cycle ``c`` is ``values[c] if c <
+        len(values) else get(c)``.
+
+        The values are expanded up to and including the last time point,
+        but to no more than ``max(1024, 16 * len(time))`` cycles, so that
+        sparse time points far in the future don't blow up the schedule.
+        """
+        time = self._time
+        n_cycles = max(_MIN_EXPANSION, _EXPANSION_FACTOR * len(time))
+        if time[-1] < n_cycles:
+            n_cycles = max(0, math.floor(time[-1]) + 1)
+        return self.expand(n_cycles), self.get
+
+
+class RunLengthSeries:
+    def __init__(self) -> None:
+        """Series of values stored as runs of repeated values.
+
+        Consecutive values are merged into one run if they are the same
+        object, which is the case for ports whose value doesn't change.
+        Iterating over the series yields the individual values.
+        """
+        self._values = []
+        self._counts = []
+
+    @property
+    def runs(self) -> list[tuple[_ValueType, int]]:
+        """Pairs of values and the number of times they're repeated."""
+        return list(zip(self._values, self._counts))
+
+    def append(self, value: _ValueType) -> None:
+        if self._values and self._values[-1] is value:
+            self._counts[-1] += 1
+        else:
+            self._values.append(value)
+            self._counts.append(1)
+
+    def __iter__(self) -> Iterator[_ValueType]:
+        for value, count in zip(self._values, self._counts):
+            for _ in range(count):
+                yield value
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+
+class Capture:
+    def __init__(self, typecode: Optional[str] = None, rle: bool = False) -> None:
+        """Appends the values of a fixed set of ports to series stored
+        in dictionaries.
+
+        Args:
+            typecode:
+                If set, each series is an ``array.array`` with this type
+                code (for example, ``"d"`` for floats); otherwise, each
+                series is a ``list``
+            rle:
+                If set, each series is a ``RunLengthSeries`` (and
+                ``typecode`` is ignored)
+
+        If a value doesn't fit into an ``array.array`` series (for
+        example, ``None``), the series is converted to a ``list``.
+        """
+        self._typecode = typecode
+        self._rle = rle
+        self._bound = []  # Pairs of ports and ``append`` of their series
+        self._locations = []  # Pairs of dictionaries and keys of the series
+
+    def clear(self) -> None:
+        """Unbind all ports."""
+        self._bound = []
+        self._locations = []
+
+    def bind(self, port: Port, data: dict, key: str) -> None:
+        """Capture the values of ``port`` in ``data[key]``.
+
+        Args:
+            port: The port to capture
+            data: The dictionary that holds the series
+            key: The key of the series in ``data``
+        """
+        if self._rle:
+            values = data.setdefault(key, RunLengthSeries())
+        else:
+            values = data.setdefault(
+                key, [] if self._typecode is None else array.array(self._typecode)
+            )
+        self._bound.append((port, values.append))
+        self._locations.append((data, key))
+
+    def record(self) -> None:
+        """Append the current value of each bound port to its series."""
+        it = iter(self._bound)
+        while True:
+            try:
+                for port, append in it:
+                    append(port.value)
+                return
+            except (TypeError, OverflowError):
+                self._to_list(port, append)
+
+    def _to_list(self, port: Port, append: Callable) -> None:
+        index = next(i for i, (_, a) in enumerate(self._bound) if a is append)
+        data, key = self._locations[index]
+        values = list(data[key])
+        values.append(port.value)
+        data[key] = values
+        self._bound[index] = (port, values.append)
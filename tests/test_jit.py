@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("numba")
+
+from quintain.quintain import Port, Server
+from quintain.controllers import Recorder
+from quintain.jit import jit_controller
+
+
+@jit_controller("float64(float64, int64)", ["number"], "result")
+def add_two(number, cycle):
+    return number + 2
+
+
+class TestJitController:
+    def test_function(self):
+        server = Server()
+        server.add_device(
+            "add_two", [Port("number", 1.0), Port("result", 0.0)], add_two
+        )
+        logger = Recorder()
+        server.add_device("logger", [Port("result", None)], logger)
+        server.add_connection("add_two", "result", "logger", "result")
+
+        for _ in range(3):
+            server.next_cycle()
+        assert logger.data == {"result": [None, 3.0, 3.0]}
@@ -1,9 +1,17 @@
+import array
 import asyncio
 import sys
 
 import pytest
 
-from quintain.quintain import Connection, Port, Server, RealTimeServer
+from quintain.quintain import (
+    Connection,
+    Port,
+    PortBag,
+    Server,
+    State,
+    RealTimeServer,
+)
 from quintain.controllers import Controller, Recorder, LookupTable
 from quintain.services import CaptureAll, ModifyPorts
 from quintain.utility import TimeSeries
@@ -32,6 +40,17 @@ class TestConnection:
         assert receiver.value == "foo"
 
 
+class TestPortBag:
+    def test_access(self):
+        number = Port("number", 1)
+        items = Port("items", 2)
+        ports = PortBag([number, items])
+        assert ports.number is number
+        assert ports.get("number") is number
+        assert ports["items"] is items
+        assert list(ports.items()) == [("number", number), ("items", items)]
+
+
 class TestServer:
     def test_function(self):
         server = Server()
@@ -72,6 +91,183 @@ class TestServer:
             "add_two": {"number": [3, 4, 5, 5, 5], "result": [0, 5, 6, 7, 7]}
         }
 
+    def test_capture_all_rle(self):
+        server = Server()
+        server.add_device(
+            "generator",
+            [Port("number", 0)],
+            LookupTable({"number": ([0, 1, 2], [3, 4, 5])}),
+        )
+        capture_all = CaptureAll(rle=True)
+        server.add_service(capture_all)
+
+        for _ in range(5):
+            server.next_cycle()
+        assert capture_all.data == {"generator": {"number": [0, 3, 4, 5, 5]}}
+
+    def test_freeze(self):
+        server = Server()
+        server.add_device(
+            "add_two", [Port("number", 0), Port("result", 0)], Controller(add_two)
+        )
+        server.add_device(
+            "generator",
+            [Port("number", 0)],
+            LookupTable({"number": ([0, 1, 2], [3, 4, 5])}),
+        )
+        server.add_connection("generator", "number", "add_two", "number")
+        server.freeze()
+        server.next_cycle()
+        server.next_cycle()
+        # Changes are picked up after freezing.
+        logger = Recorder()
+        server.add_device("logger", [Port("result", None)], logger)
+        server.add_connection("add_two", "result", "logger", "result")
+        for _ in range(3):
+            server.next_cycle()
+        assert logger.data == {"result": [None, 6, 7]}
+
+    @pytest.mark.parametrize("freeze", [False, True])
+    def test_fanout(self, freeze):
+        server = Server()
+        x, y, z = Port("x"), Port("y"), Port("z")
+        server.add_device("foo", [Port("x", 1), Port("y", 2)])
+        server.add_device("bar", [x, y, z])
+        server.add_connection("foo", "x", "bar", "x")
+        server.add_connection("foo", "y", "bar", "y")
+        server.add_connection("foo", "x", "bar", "z")
+        if freeze:
+            server.freeze()
+        server.next_cycle()
+        assert [x.value, y.value, z.value] == [1, 2, 1]
+
+    @pytest.mark.parametrize("freeze", [False, True])
+    def test_chained_connections(self, freeze):
+        # Transfers happen in the order in which the connections were
+        # added, so ``z`` receives the old value of ``y``.
+        server = Server()
+        x, y, z = Port("x", 1), Port("y", 2), Port("z", 3)
+        server.add_device("foo", [x, y, z])
+        server.add_connection("foo", "y", "foo", "z")
+        server.add_connection("foo", "x", "foo", "y")
+        if freeze:
+            server.freeze()
+        server.next_cycle()
+        assert [x.value, y.value, z.value] == [1, 1, 2]
+
+    def test_controller_without_state(self):
+        class Increment:
+            def execute(self, ports):
+                ports.get("x").value += 1
+
+        server = Server()
+        port = Port("x", 0)
+        server.add_device("foo", [port], Increment())
+        server.next_cycle()
+        server.freeze()
+        server.next_cycle()
+        assert port.value == 2
+
+    def test_controller_subclass(self):
+        class Counter(Controller):
+            def __init__(self):
+                super().__init__()
+                self.calls = 0
+
+            def execute(self, ports, state):
+                self.calls += 1
+
+        server = Server()
+        counter = Counter()
+        server.add_device("foo", [], counter)
+        server.next_cycle()
+        server.freeze()
+        server.next_cycle()
+        assert counter.calls == 2
+
+    def test_mock_controller(self, mocker):
+        controller = mocker.Mock()
+        server = Server()
+        server.add_device("foo", [Port("x")], controller)
+        server.next_cycle()
+        assert controller.execute.call_count == 1
+
+    def test_controller_instance_execute(self):
+        calls = []
+        controller = Controller()
+        controller.execute = lambda ports, state: calls.append(state)
+        server = Server()
+        server.add_device("foo", [Port("x")], controller)
+        server.next_cycle()
+        assert len(calls) == 1
+
+    def test_state_with_default_or_varargs(self):
+        received = []
+
+        class Default:
+            def execute(self, ports, state=None):
+                received.append(state)
+
+        class VarArgs:
+            def execute(self, *args):
+                received.append(args[-1])
+
+        class Service:
+            def execute(self, clients, connections, state=None):
+                received.append(state)
+
+        class VarArgsService:
+            def execute(self, *args):
+                received.append(args[-1])
+
+        state = State()
+        server = Server(state)
+        server.add_device("foo", [], Default())
+        server.add_device("bar", [], VarArgs())
+        server.add_service(Service())
+        server.add_service(VarArgsService())
+        server.next_cycle()
+        server.freeze()
+        server.next_cycle()
+        assert received == [state] * 8
+
+    def test_capture_all_device_added_later(self):
+        server = Server()
+        capture_all = CaptureAll()
+        server.add_service(capture_all)
+        server.add_device("foo", [Port("x", 1)])
+        server.next_cycle()
+        server.add_device("bar", [Port("y", 2)])
+        server.next_cycle()
+        assert capture_all.data == {"foo": {"x": [1, 1]}, "bar": {"y": [2]}}
+
+    def test_service_priority(self):
+        order = []
+
+        class Service:
+            def __init__(self, name):
+                self._name = name
+
+            def execute(self, clients, connections, state):
+                order.append(self._name)
+
+        server = Server()
+        server.add_service(Service("a"))
+        server.add_service(Service("b"), priority=10)
+        server.add_service(Service("c"))
+        server.add_service(Service("d"), priority=1000)
+        server.next_cycle()
+        assert order == ["d", "b", "a", "c"]
+
+    def test_recorder_typecode(self):
+        server = Server()
+        recorder = Recorder(typecode="q")
+        server.add_device("foo", [Port("x", 1), Port("y", None)], recorder)
+        server.next_cycle()
+        server.next_cycle()
+        assert recorder.data["x"] == array.array("q", [1, 1])
+        assert recorder.data["y"] == [None, None]
+
 
 class TestRealTimeServer:
     async def test_with_mock(self, mocker):
@@ -89,6 +285,16 @@ class TestRealTimeServer:
         await asyncio.sleep(duration)
         assert mock.next_cycle.call_count == 2
 
+    async def test_stop_is_prompt(self, mocker):
+        mock = mocker.Mock(next_cycle=mocker.Mock())
+        server = RealTimeServer(mock, duration=10.0)
+
+        server.start()
+        await asyncio.sleep(0.01)
+        server.stop()
+        await asyncio.wait_for(server.join(), timeout=1.0)
+        assert mock.next_cycle.call_count == 1
+
     async def test_function(self):
         duration = 0.1
         server = RealTimeServer(duration=duration)
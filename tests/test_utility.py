@@ -1,3 +1,7 @@
+import bisect
+import functools
+import random
+
 import pytest
 
 from quintain import utility
@@ -15,3 +19,64 @@ class TestTimeSeries:
         assert ts.get(2) == 4
         assert ts.get(3) == 2
         assert ts.get(4) == 2
+
+    def test_get_non_monotonic(self):
+        ts = utility.TimeSeries(
+            time=[0, 1, 3, 7],
+            values=[5, 4, 2, 1],
+        )
+        assert ts.get(8) == 1
+        assert ts.get(2) == 4
+        assert ts.get(2) == 4
+        assert ts.get(-1) == 5
+        assert ts.get(5) == 2
+        assert ts.get(0.5) == 5
+
+    def test_expand(self):
+        ts = utility.TimeSeries(
+            time=[0, 1, 3],
+            values=[5, 4, 2],
+        )
+        assert ts.expand() == [5, 4, 4, 2]
+        assert ts.expand(6) == [5, 4, 4, 2, 2, 2]
+        assert ts.expand(2) == [5, 4]
+
+    def test_get_jit(self):
+        pytest.importorskip("numba")
+        ts = utility.TimeSeries(time=[0.0, 1.0, 3.0], values=[5.0, 4.0, 2.0])
+        assert isinstance(ts.get, functools.partial)
+        assert [ts.get(t) for t in [-1, 0, 1, 2, 3, 4]] == [5, 5, 4, 4, 2, 2]
+        ts = utility.TimeSeries(time=[0, 1, 3], values=[5, 4, 2])
+        assert type(ts.get(2)) is int
+
+    @pytest.mark.parametrize("end", [5_000_000, 1e12, float("inf")])
+    def test_schedule_sparse(self, end):
+        ts = utility.TimeSeries(time=[0, 2, end], values=[5, 4, 2])
+        values, get = ts.schedule()
+        assert len(values) <= 1024
+        assert values[:4] == [5, 5, 4, 4]
+        assert get(len(values)) == 4
+        assert get(5_000_000 - 1) == 4
+        assert get(end) == 2
+        assert get(end + 1) == 2
+
+    def test_get_uniform(self):
+        random.seed(0)
+        time = [0.5 * i + random.uniform(-0.01, 0.01) for i in range(100)]
+        values = list(range(100))
+        ts = utility.TimeSeries(time, values)
+        for _ in range(1000):
+            t = random.uniform(-5, 55)
+            expected = values[max(0, bisect.bisect_right(time, t) - 1)]
+            assert ts.get(t) == expected
+
+
+class TestRunLengthSeries:
+    def test_append(self):
+        a, b = object(), object()
+        series = utility.RunLengthSeries()
+        for value in [a, a, b, a, a, a]:
+            series.append(value)
+        assert series.runs == [(a, 2), (b, 1), (a, 3)]
+        assert list(series) == [a, a, b, a, a, a]
+        assert len(series) == 6